@@ -0,0 +1,159 @@
+"""Bloom filter for deduplicating listing IDs across scrapes and runs."""
+
+import math
+import struct
+from pathlib import Path
+from typing import Iterator
+
+import xxhash
+
+
+_MAGIC = b"BLM3"  # BLM1/BLM2 files held a single fixed-size filter
+_HEADER = struct.Struct("<4sQdI")  # magic, capacity, error_rate, num_slices
+_SLICE_HEADER = struct.Struct("<QQIQ")  # capacity, num_bits, num_hashes, count
+
+
+class _BloomSlice:
+    """One fixed-size Bloom filter within a BloomFilter."""
+
+    __slots__ = ("capacity", "num_bits", "num_hashes", "bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float):
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.capacity = capacity
+        self.num_bits = num_bits
+        self.num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.bits = bytearray((num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1: int, h2: int) -> Iterator[int]:
+        """Bit positions for a key's hash pair, via double hashing."""
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+
+class BloomFilter:
+    """Scalable Bloom filter over string keys.
+
+    Uses ~15-20 bits per key instead of a full Python string per key, and
+    can be saved to disk so dedup state survives process restarts.
+    Membership tests never miss a key that was added; a key that was never
+    added is reported as present with probability at most ~error_rate.
+
+    Keys go into a fixed-size slice sized for `capacity` keys. Once a
+    slice is full a new one is chained on, twice as large and with a
+    tighter error rate, so the overall false-positive rate stays bounded
+    however many keys the persisted state accumulates.
+    """
+
+    GROWTH = 2  # Each new slice holds this many times more keys
+    TIGHTENING = 0.9  # and has this fraction of the previous error rate
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._slices: list[_BloomSlice] = []
+        self._add_slice()
+
+    def _add_slice(self) -> _BloomSlice:
+        """Chain on the next, larger slice."""
+        i = len(self._slices)
+        # Per-slice error rates form a geometric series summing to error_rate
+        error_rate = self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** i
+        bloom_slice = _BloomSlice(self.capacity * self.GROWTH ** i, error_rate)
+        self._slices.append(bloom_slice)
+        return bloom_slice
+
+    @staticmethod
+    def _hash(key: str) -> tuple[int, int]:
+        """Hash pair for double hashing, from one 128-bit xxhash digest."""
+        digest = xxhash.xxh3_128_intdigest(key.encode())
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, key: str) -> bool:
+        """Add a key to the filter.
+
+        Returns:
+            True if the key was new, False if it was (probably) already
+            present, in which case the filter is left unchanged
+        """
+        hashes = self._hash(key)
+        if any(hashes in bloom_slice for bloom_slice in self._slices):
+            return False
+        bloom_slice = self._slices[-1]
+        if bloom_slice.count >= bloom_slice.capacity:
+            bloom_slice = self._add_slice()
+        bloom_slice.add(*hashes)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        hashes = self._hash(key)
+        return any(hashes in bloom_slice for bloom_slice in self._slices)
+
+    def __len__(self) -> int:
+        """Number of distinct keys added (approximate)."""
+        return sum(bloom_slice.count for bloom_slice in self._slices)
+
+    def save(self, path: Path) -> None:
+        """Write the filter to a file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.capacity, self.error_rate, len(self._slices)))
+            for bloom_slice in self._slices:
+                f.write(_SLICE_HEADER.pack(
+                    bloom_slice.capacity,
+                    bloom_slice.num_bits,
+                    bloom_slice.num_hashes,
+                    bloom_slice.count,
+                ))
+                f.write(bloom_slice.bits)
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        """Read a filter previously written with save()."""
+        data = Path(path).read_bytes()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Truncated Bloom filter state file: {path}")
+        magic, capacity, error_rate, num_slices = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a Bloom filter state file: {path}")
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.error_rate = error_rate
+        bloom._slices = []
+        offset = _HEADER.size
+        for _ in range(num_slices):
+            if len(data) < offset + _SLICE_HEADER.size:
+                raise ValueError(f"Truncated Bloom filter state file: {path}")
+            slice_capacity, num_bits, num_hashes, count = _SLICE_HEADER.unpack_from(
+                data, offset
+            )
+            offset += _SLICE_HEADER.size
+            size = (num_bits + 7) // 8
+            if len(data) < offset + size:
+                raise ValueError(f"Truncated Bloom filter state file: {path}")
+
+            bloom_slice = _BloomSlice.__new__(_BloomSlice)
+            bloom_slice.capacity = slice_capacity
+            bloom_slice.num_bits = num_bits
+            bloom_slice.num_hashes = num_hashes
+            bloom_slice.bits = bytearray(data[offset:offset + size])
+            bloom_slice.count = count
+            bloom._slices.append(bloom_slice)
+            offset += size
+
+        if not bloom._slices or offset != len(data):
+            raise ValueError(f"Corrupt Bloom filter state file: {path}")
+        return bloom
@@ -1,22 +1,69 @@
 """eBay API client for fetching sold listings via the Finding API."""
 
+import asyncio
 import base64
 import httpx
+import io
 import logging
+import math
 import os
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
-from xml.etree import ElementTree as ET
-
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from xml.sax.saxutils import escape as xml_escape
+
+import orjson
 from dotenv import load_dotenv
+from lxml import etree
+
+from ..utils.aio import run_sync
+from .parser import listings_to_json_bytes
 
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+NS = {"ns": "http://www.ebay.com/marketplace/search/v1/services"}
+
+_ITEM_TAG = f"{{{NS['ns']}}}item"
+_ACK_TAG = f"{{{NS['ns']}}}ack"
+_ERROR_TAG = f"{{{NS['ns']}}}message"
+_TOTAL_PAGES_TAG = f"{{{NS['ns']}}}totalPages"
+
+_ITEM_ID_TAG = f"{{{NS['ns']}}}itemId"
+_TITLE_TAG = f"{{{NS['ns']}}}title"
+_URL_TAG = f"{{{NS['ns']}}}viewItemURL"
+_PRICE_TAG = f"{{{NS['ns']}}}currentPrice"
+_SHIPPING_TAG = f"{{{NS['ns']}}}shippingServiceCost"
+_END_TIME_TAG = f"{{{NS['ns']}}}endTime"
+
+# Pulls every field element of an item in a single traversal
+_ITEM_FIELDS_XP = etree.XPath(
+    "ns:itemId | ns:title | ns:viewItemURL"
+    " | ns:sellingStatus/ns:currentPrice"
+    " | ns:shippingInfo/ns:shippingServiceCost"
+    " | ns:listingInfo/ns:endTime",
+    namespaces=NS,
+)
+
+_FINDING_REQUEST_TEMPLATE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<findCompletedItemsRequest xmlns="http://www.ebay.com/marketplace/search/v1/services">
+    <keywords>%b</keywords>
+    <itemFilter>
+        <name>SoldItemsOnly</name>
+        <value>true</value>
+    </itemFilter>
+    <sortOrder>EndTimeSoonest</sortOrder>
+    <paginationInput>
+        <entriesPerPage>%d</entriesPerPage>
+        <pageNumber>%d</pageNumber>
+    </paginationInput>
+</findCompletedItemsRequest>"""
 
-@dataclass
+
+@dataclass(slots=True)
 class SoldItem:
     """Represents a sold item from eBay API."""
 
@@ -29,23 +76,110 @@ class SoldItem:
     scraped_at: datetime
 
     def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
+        """Convert to dictionary for JSON serialization with orjson.
+
+        Like SoldListing.to_dict(), datetimes are left as datetime objects,
+        so the dict is only serializable with orjson, not the json module.
+        """
         return {
             "listing_id": self.listing_id,
             "title": self.title,
             "price": self.price,
             "shipping_price": self.shipping_price,
-            "sold_date": self.sold_date.isoformat() if self.sold_date else None,
+            "sold_date": self.sold_date,
             "listing_url": self.listing_url,
-            "scraped_at": self.scraped_at.isoformat(),
+            "scraped_at": self.scraped_at,
         }
 
+    to_json_bytes = staticmethod(listings_to_json_bytes)
+
+
+@dataclass
+class SoldItemBatch:
+    """Columnar (struct-of-arrays) storage for a batch of sold items.
+
+    Numeric columns are typed arrays so analytics such as
+    statistics.fmean(batch.prices) run without touching per-row objects.
+    Missing shipping prices and sold dates are stored as NaN; sold dates
+    are UTC epoch seconds.
+    """
+
+    scraped_at: datetime
+    listing_ids: list[str] = field(default_factory=list)
+    titles: list[str] = field(default_factory=list)
+    prices: array = field(default_factory=lambda: array("d"))
+    shipping_prices: array = field(default_factory=lambda: array("d"))
+    sold_dates_epoch: array = field(default_factory=lambda: array("d"))
+    urls: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.listing_ids)
+
+    def append(
+        self,
+        listing_id: str,
+        title: str,
+        price: float,
+        shipping_price: Optional[float],
+        sold_date: Optional[datetime],
+        listing_url: str,
+    ) -> None:
+        """Append a single row to every column."""
+        self.listing_ids.append(listing_id)
+        self.titles.append(title)
+        self.prices.append(price)
+        self.shipping_prices.append(
+            shipping_price if shipping_price is not None else float("nan")
+        )
+        self.sold_dates_epoch.append(
+            sold_date.replace(tzinfo=timezone.utc).timestamp()
+            if sold_date is not None else float("nan")
+        )
+        self.urls.append(listing_url)
+
+    def extend(self, other: "SoldItemBatch") -> None:
+        """Append all rows of another batch."""
+        self.listing_ids.extend(other.listing_ids)
+        self.titles.extend(other.titles)
+        self.prices.extend(other.prices)
+        self.shipping_prices.extend(other.shipping_prices)
+        self.sold_dates_epoch.extend(other.sold_dates_epoch)
+        self.urls.extend(other.urls)
+
+    def to_dict_rows(self) -> list[dict]:
+        """Convert to a list of SoldItem.to_dict()-style rows (orjson only)."""
+        scraped_at = self.scraped_at
+        rows = []
+        for listing_id, title, price, shipping, sold_epoch, url in zip(
+            self.listing_ids,
+            self.titles,
+            self.prices,
+            self.shipping_prices,
+            self.sold_dates_epoch,
+            self.urls,
+        ):
+            rows.append({
+                "listing_id": listing_id,
+                "title": title,
+                "price": price,
+                "shipping_price": None if math.isnan(shipping) else shipping,
+                "sold_date": (
+                    None if math.isnan(sold_epoch)
+                    else datetime.fromtimestamp(sold_epoch, timezone.utc)
+                    .replace(tzinfo=None)
+                ),
+                "listing_url": url,
+                "scraped_at": scraped_at,
+            })
+        return rows
+
 
 class EbayApiClient:
     """Client for eBay Finding API to get completed/sold listings."""
 
     FINDING_API_URL = "https://svcs.ebay.com/services/search/FindingService/v1"
     OAUTH_URL = "https://api.ebay.com/identity/v1/oauth2/token"
+    TOKEN_EXPIRY_SKEW = 300  # Refresh tokens 5 minutes before they expire
 
     def __init__(
         self,
@@ -60,10 +194,14 @@ class EbayApiClient:
 
         self._client = httpx.Client(timeout=30.0)
         self._access_token: Optional[str] = None
+        self._token_expiry = 0.0
 
     def _get_access_token(self) -> str:
-        """Get OAuth access token using client credentials flow."""
-        if self._access_token:
+        """Get OAuth access token using client credentials flow.
+
+        The token is cached until shortly before its expires_in deadline.
+        """
+        if self._access_token and time.monotonic() < self._token_expiry:
             return self._access_token
 
         credentials = base64.b64encode(
@@ -85,9 +223,33 @@ class EbayApiClient:
 
         data = response.json()
         self._access_token = data["access_token"]
+        self._token_expiry = (
+            time.monotonic() + data.get("expires_in", 7200) - self.TOKEN_EXPIRY_SKEW
+        )
         logger.info("Successfully obtained eBay OAuth token")
         return self._access_token
 
+    def _finding_headers(self) -> dict:
+        """Get headers for a findCompletedItems call."""
+        # Finding API uses the App ID directly (no OAuth needed for this endpoint)
+        return {
+            "X-EBAY-SOA-SECURITY-APPNAME": self.client_id,
+            "X-EBAY-SOA-OPERATION-NAME": "findCompletedItems",
+            "X-EBAY-SOA-SERVICE-VERSION": "1.13.0",
+            "X-EBAY-SOA-RESPONSE-DATA-FORMAT": "XML",
+            "X-EBAY-SOA-GLOBAL-ID": "EBAY-US",
+            "Content-Type": "application/xml",
+        }
+
+    @staticmethod
+    def _build_finding_request(query: str, page: int, per_page: int) -> bytes:
+        """Build the findCompletedItems XML request body."""
+        return _FINDING_REQUEST_TEMPLATE % (
+            xml_escape(query).encode(),
+            per_page,
+            page,
+        )
+
     def search_sold_items(
         self,
         query: str,
@@ -104,35 +266,49 @@ class EbayApiClient:
         Returns:
             Tuple of (list of SoldItem, total_pages)
         """
-        # Finding API uses the App ID directly (no OAuth needed for this endpoint)
-        headers = {
-            "X-EBAY-SOA-SECURITY-APPNAME": self.client_id,
-            "X-EBAY-SOA-OPERATION-NAME": "findCompletedItems",
-            "X-EBAY-SOA-SERVICE-VERSION": "1.13.0",
-            "X-EBAY-SOA-RESPONSE-DATA-FORMAT": "XML",
-            "X-EBAY-SOA-GLOBAL-ID": "EBAY-US",
-            "Content-Type": "application/xml",
-        }
+        response = self._client.post(
+            self.FINDING_API_URL,
+            headers=self._finding_headers(),
+            content=self._build_finding_request(query, page, per_page),
+        )
+        response.raise_for_status()
 
-        # Build XML request
-        xml_request = f"""<?xml version="1.0" encoding="UTF-8"?>
-<findCompletedItemsRequest xmlns="http://www.ebay.com/marketplace/search/v1/services">
-    <keywords>{query}</keywords>
-    <itemFilter>
-        <name>SoldItemsOnly</name>
-        <value>true</value>
-    </itemFilter>
-    <sortOrder>EndTimeSoonest</sortOrder>
-    <paginationInput>
-        <entriesPerPage>{per_page}</entriesPerPage>
-        <pageNumber>{page}</pageNumber>
-    </paginationInput>
-</findCompletedItemsRequest>"""
+        return self._parse_finding_response(response.text)
 
+    def search_sold_items_batch(
+        self,
+        query: str,
+        page: int = 1,
+        per_page: int = 100,
+    ) -> tuple[SoldItemBatch, int]:
+        """Search for completed/sold items, returning columnar results.
+
+        Same as search_sold_items but skips building a SoldItem per row.
+
+        Returns:
+            Tuple of (SoldItemBatch, total_pages)
+        """
         response = self._client.post(
             self.FINDING_API_URL,
-            headers=headers,
-            content=xml_request,
+            headers=self._finding_headers(),
+            content=self._build_finding_request(query, page, per_page),
+        )
+        response.raise_for_status()
+
+        return self._parse_finding_batch(response.text)
+
+    async def _fetch_page_async(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        page: int,
+        per_page: int = 100,
+    ) -> tuple[list[SoldItem], int]:
+        """Async version of search_sold_items using a shared AsyncClient."""
+        response = await client.post(
+            self.FINDING_API_URL,
+            headers=self._finding_headers(),
+            content=self._build_finding_request(query, page, per_page),
         )
         response.raise_for_status()
 
@@ -140,95 +316,166 @@ class EbayApiClient:
 
     def _parse_finding_response(self, xml_text: str) -> tuple[list[SoldItem], int]:
         """Parse Finding API XML response."""
-        # Define namespace
-        ns = {"ns": "http://www.ebay.com/marketplace/search/v1/services"}
+        scraped_at = datetime.now(timezone.utc)
+        items: list[SoldItem] = []
 
-        root = ET.fromstring(xml_text)
-        scraped_at = datetime.utcnow()
-        items = []
+        def emit(*row) -> None:
+            items.append(SoldItem(*row, scraped_at=scraped_at))
 
-        # Check for errors
-        ack = root.find(".//ns:ack", ns)
-        if ack is not None and ack.text != "Success":
-            error = root.find(".//ns:errorMessage/ns:error/ns:message", ns)
-            error_msg = error.text if error is not None else "Unknown error"
-            logger.error(f"eBay API error: {error_msg}")
-            raise Exception(f"eBay API error: {error_msg}")
+        total_pages = self._parse_finding_xml(xml_text, emit)
+        return items, total_pages
+
+    def _parse_finding_batch(self, xml_text: str) -> tuple[SoldItemBatch, int]:
+        """Parse Finding API XML response straight into columns."""
+        batch = SoldItemBatch(scraped_at=datetime.now(timezone.utc))
+        total_pages = self._parse_finding_xml(xml_text, batch.append)
+        return batch, total_pages
+
+    def _parse_finding_xml(self, xml_text: str, emit: Callable[..., None]) -> int:
+        """Stream items out of a Finding API XML response.
 
-        # Get pagination info
+        Args:
+            xml_text: Raw XML response body
+            emit: Called with (listing_id, title, price, shipping_price,
+                sold_date, listing_url) for every parsed item
+
+        Returns:
+            Total number of result pages reported by the API
+        """
+        count = 0
+        ack = None
+        error_msg = None
         total_pages = 0
-        pagination = root.find(".//ns:paginationOutput/ns:totalPages", ns)
-        if pagination is not None:
-            total_pages = int(pagination.text)
 
-        # Parse items
-        for item in root.findall(".//ns:searchResult/ns:item", ns):
+        # Stream the document so each item subtree is freed once parsed
+        context = etree.iterparse(
+            io.BytesIO(xml_text.encode()),
+            events=("end",),
+            tag=(_ITEM_TAG, _ACK_TAG, _ERROR_TAG, _TOTAL_PAGES_TAG),
+        )
+        for _, elem in context:
+            if elem.tag == _ACK_TAG:
+                ack = elem.text
+                continue
+            if elem.tag == _ERROR_TAG:
+                error_msg = error_msg or elem.text
+                continue
+            if elem.tag == _TOTAL_PAGES_TAG:
+                total_pages = int(elem.text)
+                continue
+
             try:
-                listing_id = item.find("ns:itemId", ns)
-                title = item.find("ns:title", ns)
-                url = item.find("ns:viewItemURL", ns)
+                fields = {child.tag: child.text for child in _ITEM_FIELDS_XP(elem)}
+                listing_id = fields.get(_ITEM_ID_TAG)
+                title = fields.get(_TITLE_TAG)
 
                 # Price
-                price_elem = item.find(".//ns:sellingStatus/ns:currentPrice", ns)
-                price = float(price_elem.text) if price_elem is not None else 0.0
+                price_text = fields.get(_PRICE_TAG)
+                price = float(price_text) if price_text else 0.0
 
                 # Shipping
-                shipping_elem = item.find(".//ns:shippingInfo/ns:shippingServiceCost", ns)
-                shipping_price = float(shipping_elem.text) if shipping_elem is not None else None
+                shipping_text = fields.get(_SHIPPING_TAG)
+                shipping_price = float(shipping_text) if shipping_text else None
 
                 # End time (sold date)
-                end_time_elem = item.find(".//ns:listingInfo/ns:endTime", ns)
+                end_time = fields.get(_END_TIME_TAG)
                 sold_date = None
-                if end_time_elem is not None:
+                if end_time:
                     # Parse ISO format: 2024-01-15T14:30:00.000Z
-                    sold_date = datetime.fromisoformat(
-                        end_time_elem.text.replace("Z", "+00:00")
-                    ).replace(tzinfo=None)
-
-                if listing_id is not None and title is not None:
-                    items.append(SoldItem(
-                        listing_id=listing_id.text,
-                        title=title.text,
-                        price=price,
-                        shipping_price=shipping_price,
-                        sold_date=sold_date,
-                        listing_url=url.text if url is not None else "",
-                        scraped_at=scraped_at,
-                    ))
+                    sold_date = datetime.fromisoformat(end_time).replace(tzinfo=None)
+
+                if listing_id and title:
+                    emit(
+                        listing_id,
+                        title,
+                        price,
+                        shipping_price,
+                        sold_date,
+                        fields.get(_URL_TAG) or "",
+                    )
+                    count += 1
             except Exception as e:
                 logger.warning(f"Failed to parse item: {e}")
-                continue
+            finally:
+                # Drop the parsed item and any already-processed siblings
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
 
-        logger.info(f"Parsed {len(items)} items, total pages: {total_pages}")
-        return items, total_pages
+        # Check for errors
+        if ack is not None and ack != "Success":
+            error_msg = error_msg or "Unknown error"
+            logger.error(f"eBay API error: {error_msg}")
+            raise Exception(f"eBay API error: {error_msg}")
 
-    def search_all_sold_items(
+        logger.info(f"Parsed {count} items, total pages: {total_pages}")
+        return total_pages
+
+    async def search_all_sold_items_async(
         self,
         query: str,
         max_pages: int = 10,
+        max_concurrency: int = 4,
     ) -> list[SoldItem]:
-        """Search and paginate through all sold items.
+        """Search and paginate through all sold items concurrently.
+
+        Page 1 is fetched first to learn the page count; the remaining pages
+        are then requested in parallel, at most max_concurrency at a time.
 
         Args:
             query: Search keywords
             max_pages: Maximum pages to fetch
+            max_concurrency: Maximum number of in-flight page requests
 
         Returns:
-            List of all SoldItem objects
+            List of all SoldItem objects, in page order
         """
-        all_items = []
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async with httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        ) as client:
+
+            async def fetch(page: int) -> list[SoldItem]:
+                async with semaphore:
+                    logger.info(f"Fetching page {page}...")
+                    items, _ = await self._fetch_page_async(client, query, page)
+                    return items
+
+            logger.info("Fetching page 1...")
+            all_items, total_pages = await self._fetch_page_async(client, query, 1)
+            logger.info(f"Page 1/{total_pages}: Got {len(all_items)} items")
+
+            last_page = min(total_pages, max_pages)
+            if last_page > 1:
+                pages = await asyncio.gather(
+                    *(fetch(page) for page in range(2, last_page + 1))
+                )
+                for items in pages:
+                    all_items.extend(items)
+
+        logger.info(f"Fetched {len(all_items)} items from {max(last_page, 1)} pages")
+        return all_items
 
-        for page in range(1, max_pages + 1):
-            logger.info(f"Fetching page {page}...")
-            items, total_pages = self.search_sold_items(query, page=page)
-            all_items.extend(items)
+    def search_all_sold_items(
+        self,
+        query: str,
+        max_pages: int = 10,
+    ) -> list[SoldItem]:
+        """Search and paginate through all sold items.
 
-            logger.info(f"Page {page}/{total_pages}: Got {len(items)} items (total: {len(all_items)})")
+        Synchronous wrapper around search_all_sold_items_async; also safe
+        to call from code that is already running an event loop.
 
-            if page >= total_pages:
-                break
+        Args:
+            query: Search keywords
+            max_pages: Maximum pages to fetch
 
-        return all_items
+        Returns:
+            List of all SoldItem objects
+        """
+        return run_sync(self.search_all_sold_items_async(query, max_pages))
 
     def close(self):
         """Close the HTTP client."""
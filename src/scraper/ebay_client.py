@@ -1,9 +1,12 @@
 """HTTP client for making requests to eBay with anti-detection measures."""
 
+import asyncio
 import httpx
+import itertools
 import random
 import time
 import logging
+from importlib.util import find_spec
 from urllib.parse import urlencode
 from typing import Optional
 
@@ -18,6 +21,17 @@ class ChallengePageError(Exception):
     pass
 
 
+# httpx only speaks HTTP/2 and decodes brotli/zstd bodies when its optional
+# extras are installed; without them fall back to HTTP/1.1 and gzip/deflate
+# rather than failing or receiving bodies it can't decode
+_HTTP2 = find_spec("h2") is not None
+_ACCEPT_ENCODING = ", ".join(
+    ["gzip", "deflate"]
+    + (["br"] if find_spec("brotli") or find_spec("brotlicffi") else [])
+    + (["zstd"] if find_spec("zstandard") else [])
+)
+
+
 # Rotate through different User-Agents
 USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
@@ -28,6 +42,32 @@ USER_AGENTS = [
 ]
 
 
+def _build_headers(user_agent: str) -> dict:
+    """Build the full browser-like header set for a User-Agent."""
+    return {
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": _ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+        "Sec-Ch-Ua": '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
+        "Sec-Ch-Ua-Mobile": "?0",
+        "Sec-Ch-Ua-Platform": '"macOS"' if "Mac" in user_agent else '"Windows"',
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "none",
+        "Sec-Fetch-User": "?1",
+        "Upgrade-Insecure-Requests": "1",
+    }
+
+
+# Header sets are built once at import and rotated per request
+_UA_HEADERS = [_build_headers(user_agent) for user_agent in USER_AGENTS]
+_UA_HEADERS_CYCLE = itertools.cycle(_UA_HEADERS)
+
+
 class EbayClient:
     """HTTP client for fetching eBay sold listings pages."""
 
@@ -46,53 +86,65 @@ class EbayClient:
         self.max_retries = max_retries
         self.timeout = timeout
         self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
         self._request_count = 0
+        self._backoff_until = 0.0  # time.monotonic() deadline shared by async fetches
 
     def _get_headers(self) -> dict:
-        """Get randomized headers for each request."""
-        user_agent = random.choice(USER_AGENTS)
-
-        headers = {
-            "User-Agent": user_agent,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-            "Sec-Ch-Ua": '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"macOS"' if "Mac" in user_agent else '"Windows"',
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Upgrade-Insecure-Requests": "1",
-        }
-        return headers
+        """Get the next set of rotated headers for a request."""
+        return next(_UA_HEADERS_CYCLE).copy()
 
     def _get_client(self) -> httpx.Client:
-        """Get or create the HTTP client with fresh headers."""
-        if self._client is None or self._request_count >= 5:
-            # Recreate client periodically to refresh session
-            if self._client is not None:
-                self._client.close()
+        """Get or create the pooled HTTP client, refreshing its session."""
+        if self._client is None:
             self._client = httpx.Client(
+                http2=_HTTP2,
                 timeout=self.timeout,
                 follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
             )
             self._request_count = 0
+        elif self._request_count >= 5:
+            # Drop cookies periodically to refresh the session while keeping
+            # pooled connections (and their TLS sessions) alive
+            self._client.cookies.clear()
+            self._request_count = 0
         return self._client
 
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled async HTTP client, refreshing its session."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=_HTTP2,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            )
+            self._request_count = 0
+        elif self._request_count >= 5:
+            self._async_client.cookies.clear()
+            self._request_count = 0
+        return self._async_client
+
     def _is_challenge_page(self, html: str, url: str) -> bool:
         """Check if the response is a challenge/captcha page."""
-        indicators = [
-            "splashui/challenge" in url,
-            "pardon our interruption" in html.lower(),
-            "captcha" in html.lower(),
-            len(html) < 10000 and "s-card" not in html and "srp-results" not in html,
-        ]
-        return any(indicators)
+        if "splashui/challenge" in url:
+            return True
+        # Lowercase the page at most once; short pages are checked last
+        lower = html.lower()
+        return (
+            "pardon our interruption" in lower
+            or "captcha" in lower
+            or (len(html) < 10000 and "s-card" not in html and "srp-results" not in html)
+        )
+
+    @staticmethod
+    def _attempt_delay(attempt: int, is_retry: bool) -> tuple[float, float]:
+        """Base and variance of the delay before a fetch attempt."""
+        # Longer for retries and subsequent pages
+        if attempt > 0 or is_retry:
+            return 5.0 + (attempt * 3.0), 8.0
+        return 2.0, 4.0
 
     def _random_delay(self, base: float = 3.0, variance: float = 5.0) -> None:
         """Add a random delay to appear more human-like."""
@@ -100,6 +152,12 @@ class EbayClient:
         logger.debug(f"Waiting {delay:.1f}s...")
         time.sleep(delay)
 
+    async def _random_delay_async(self, base: float = 3.0, variance: float = 5.0) -> None:
+        """Async version of _random_delay."""
+        delay = base + random.uniform(0, variance)
+        logger.debug(f"Waiting {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
     def build_sold_listings_url(
         self,
         query: str,
@@ -126,16 +184,14 @@ class EbayClient:
         """Fetch a single page from eBay with retry logic."""
         last_error = None
 
-        for attempt in range(self.max_retries):
-            # Wait for rate limiter
-            self.rate_limiter.acquire_sync()
+        # Wait for rate limiter once per logical request; retries are paced
+        # by the backoff delays below
+        self.rate_limiter.acquire_sync()
 
+        for attempt in range(self.max_retries):
             # Add random delay (longer for retries)
-            if attempt > 0 or is_retry:
-                base_delay = 5.0 + (attempt * 3.0)
-                self._random_delay(base=base_delay, variance=8.0)
-            else:
-                self._random_delay(base=2.0, variance=4.0)
+            base, variance = self._attempt_delay(attempt, is_retry)
+            self._random_delay(base=base, variance=variance)
 
             try:
                 client = self._get_client()
@@ -179,6 +235,75 @@ class EbayClient:
             raise last_error
         raise ChallengePageError("Failed to fetch page after all retries")
 
+    def _start_backoff(self, delay: float) -> None:
+        """Hold back every async fetch on this client for delay seconds."""
+        self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+
+    async def _wait_for_backoff(self) -> None:
+        """Sleep until any backoff started by a 429 or challenge has passed."""
+        delay = self._backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def fetch_page_async(self, url: str, is_retry: bool = False) -> str:
+        """Async version of fetch_page, paced by the shared rate limiter.
+
+        Several calls may be in flight at once; they share one pooled
+        AsyncClient and the rate limiter spaces out their requests. A 429
+        or challenge page seen by any call backs off all of them.
+        """
+        last_error = None
+
+        await self.rate_limiter.acquire()
+
+        for attempt in range(self.max_retries):
+            base, variance = self._attempt_delay(attempt, is_retry)
+            await self._random_delay_async(base=base, variance=variance)
+            await self._wait_for_backoff()
+
+            try:
+                client = self._get_async_client()
+                headers = self._get_headers()
+
+                # Add referer on retries to look more natural
+                if attempt > 0:
+                    headers["Referer"] = "https://www.ebay.com/"
+
+                response = await client.get(url, headers=headers)
+                self._request_count += 1
+
+                # Handle rate limiting responses
+                if response.status_code == 429:
+                    logger.warning(f"Rate limited (429), waiting longer...")
+                    self._start_backoff(30 + random.uniform(0, 30))
+                    continue
+
+                response.raise_for_status()
+                html = response.text
+                final_url = str(response.url)
+
+                # Check for challenge page
+                if self._is_challenge_page(html, final_url):
+                    logger.warning(f"Challenge page detected on attempt {attempt + 1}")
+                    # Start a new session; the client itself stays open for
+                    # the other in-flight requests
+                    client.cookies.clear()
+                    last_error = ChallengePageError("eBay returned a challenge page")
+                    # Longer backoff for challenge pages
+                    self._start_backoff(15 + random.uniform(0, 15))
+                    continue
+
+                return html
+
+            except httpx.HTTPError as e:
+                logger.warning(f"HTTP error on attempt {attempt + 1}: {e}")
+                last_error = e
+                continue
+
+        if last_error:
+            raise last_error
+        raise ChallengePageError("Failed to fetch page after all retries")
+
     def fetch_sold_listings(
         self,
         query: str,
@@ -190,6 +315,23 @@ class EbayClient:
         is_retry = page > 1  # Be more careful on subsequent pages
         return self.fetch_page(url, is_retry=is_retry)
 
+    async def fetch_sold_listings_async(
+        self,
+        query: str,
+        page: int = 1,
+        items_per_page: int = 120,
+    ) -> str:
+        """Async version of fetch_sold_listings."""
+        url = self.build_sold_listings_url(query, page, items_per_page)
+        is_retry = page > 1  # Be more careful on subsequent pages
+        return await self.fetch_page_async(url, is_retry=is_retry)
+
+    async def aclose(self) -> None:
+        """Close the async HTTP client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def close(self) -> None:
         """Close the HTTP client."""
         if self._client is not None:
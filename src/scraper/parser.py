@@ -1,13 +1,37 @@
 """Parser for extracting sold listing data from eBay HTML."""
 
 import re
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
-from bs4 import BeautifulSoup, Tag
 
+import orjson
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
-@dataclass
+
+_PRICE_STRIP = str.maketrans("", "", "$, \t\n")
+_PRICE_RE = re.compile(r"[^\d.]")
+_SHIP_RE = re.compile(r"\$?([\d.]+)")
+_SOLD_PREFIX_RE = re.compile(r"^Sold\s+", re.IGNORECASE)
+_OPENS_RE = re.compile(r"Opens in a new window.*$", re.IGNORECASE)
+_NEW_LISTING_RE = re.compile(r"^New Listing", re.IGNORECASE)
+_RESULT_COUNT_RE = re.compile(r"([\d,]+)\s*(?:results?|items?)", re.IGNORECASE)
+
+_DATE_FORMATS = (
+    "%b %d, %Y",  # Jan 15, 2024
+    "%B %d, %Y",  # January 15, 2024
+    "%m/%d/%Y",   # 01/15/2024
+    "%d %b %Y",   # 15 Jan 2024
+)
+
+
+def listings_to_json_bytes(batch: list) -> bytes:
+    """Serialize a batch of listing dataclasses straight to JSON bytes."""
+    return orjson.dumps(batch)
+
+
+@dataclass(slots=True, frozen=True)
 class SoldListing:
     """Represents a single sold listing from eBay."""
 
@@ -18,30 +42,79 @@ class SoldListing:
     sold_date: Optional[datetime]
     listing_url: str
     scraped_at: datetime
+    _dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
 
     def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "listing_id": self.listing_id,
-            "title": self.title,
-            "price": self.price,
-            "shipping_price": self.shipping_price,
-            "sold_date": self.sold_date.isoformat() if self.sold_date else None,
-            "listing_url": self.listing_url,
-            "scraped_at": self.scraped_at.isoformat(),
-        }
+        """Convert to dictionary for JSON serialization with orjson.
+
+        Datetimes are left as datetime objects for orjson to encode natively,
+        in the same ISO 8601 form as isoformat(), so the dict is only
+        serializable with orjson, not the json module. The listing is
+        immutable, so the dict is built once; each call returns its own copy.
+        """
+        if self._dict is None:
+            object.__setattr__(self, "_dict", {
+                "listing_id": self.listing_id,
+                "title": self.title,
+                "price": self.price,
+                "shipping_price": self.shipping_price,
+                "sold_date": self.sold_date,
+                "listing_url": self.listing_url,
+                "scraped_at": self.scraped_at,
+            })
+        return self._dict.copy()
+
+    to_json_bytes = staticmethod(listings_to_json_bytes)
+
+
+@dataclass(slots=True)
+class ParsedPage:
+    """Everything extracted from a single eBay search results page.
+
+    Price statistics are accumulated while the listings are parsed, so
+    they are available even when the rows themselves are not collected.
+    """
+
+    listings: list[SoldListing] = field(default_factory=list)
+    total_results: Optional[int] = None
+    has_next: bool = False
+    price_sum: float = 0.0
+    price_count: int = 0
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    @property
+    def mean_price(self) -> Optional[float]:
+        """Average sold price on the page, or None if nothing was parsed."""
+        return self.price_sum / self.price_count if self.price_count else None
 
 
 class EbayParser:
     """Parser for eBay sold listings HTML pages."""
 
+    # CSS selectors for the s-card results markup (evaluated by Lexbor in C)
+    _CARD_CSS = "li.s-card"
+    _TITLE_CSS = ".s-card__title"
+    _LINK_CSS = "a.s-card__link"
+    _SOLD_CSS = ".s-card__caption"
+    _PRICE_CSS = ".s-card__price"
+    _ATTRIBUTE_ROW_CSS = ".s-card__attribute-row"
+    _COUNT_CSS = (".srp-controls__count-heading", ".srp-controls__count", "[class*='result']")
+    _NEXT_CSS = "a.pagination__next, a[aria-label*='next'], a[rel='next']"
+    _PAGE_LINK_CSS = "a.pagination__item"
+
     @staticmethod
     def _parse_price(price_text: str) -> Optional[float]:
         """Parse price string to float."""
         if not price_text:
             return None
-        # Remove currency symbols and commas, extract number
-        cleaned = re.sub(r"[^\d.]", "", price_text)
+        # Fast path: strip "$", commas and whitespace, e.g. "$1,015.50"
+        try:
+            return float(price_text.translate(_PRICE_STRIP))
+        except ValueError:
+            pass
+        # Fall back to removing everything but digits and dots
+        cleaned = _PRICE_RE.sub("", price_text)
         try:
             return float(cleaned)
         except ValueError:
@@ -55,8 +128,17 @@ class EbayParser:
         lower = shipping_text.lower()
         if "free" in lower:
             return 0.0
+        # Fast path: take the token following "$"
+        idx = shipping_text.find("$")
+        if idx >= 0:
+            token = shipping_text[idx + 1:].split(maxsplit=1)
+            if token:
+                try:
+                    return float(token[0].translate(_PRICE_STRIP))
+                except ValueError:
+                    pass
         # Extract numeric value
-        match = re.search(r"\$?([\d.]+)", shipping_text)
+        match = _SHIP_RE.search(shipping_text)
         if match:
             try:
                 return float(match.group(1))
@@ -65,20 +147,19 @@ class EbayParser:
         return None
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _parse_sold_date(date_text: str) -> Optional[datetime]:
-        """Parse sold date from text like 'Sold  Jan 15, 2024'."""
+        """Parse sold date from text like 'Sold  Jan 15, 2024'.
+
+        Results are memoized: a page of listings only carries a handful of
+        distinct sold dates, so each one goes through strptime once.
+        """
         if not date_text:
             return None
         # Remove "Sold" prefix and extra whitespace
-        cleaned = re.sub(r"^Sold\s+", "", date_text, flags=re.IGNORECASE).strip()
+        cleaned = _SOLD_PREFIX_RE.sub("", date_text).strip()
         # Try various date formats
-        formats = [
-            "%b %d, %Y",  # Jan 15, 2024
-            "%B %d, %Y",  # January 15, 2024
-            "%m/%d/%Y",   # 01/15/2024
-            "%d %b %Y",   # 15 Jan 2024
-        ]
-        for fmt in formats:
+        for fmt in _DATE_FORMATS:
             try:
                 return datetime.strptime(cleaned, fmt)
             except ValueError:
@@ -89,11 +170,33 @@ class EbayParser:
     def _clean_title(title: str) -> str:
         """Clean title by removing common suffixes added by eBay."""
         # Remove "Opens in a new window or tab" suffix
-        title = re.sub(r"Opens in a new window.*$", "", title, flags=re.IGNORECASE)
+        title = _OPENS_RE.sub("", title)
         # Remove "New Listing" prefix
-        title = re.sub(r"^New Listing", "", title, flags=re.IGNORECASE)
+        title = _NEW_LISTING_RE.sub("", title)
         return title.strip()
 
+    def parse(self, html: str, collect_rows: bool = True) -> ParsedPage:
+        """Parse listings, result count and pagination from one page.
+
+        The HTML is parsed once and every lookup runs against that tree.
+
+        Args:
+            html: Raw HTML content from eBay search page
+            collect_rows: Keep the parsed listings; set to False when only
+                the price statistics are needed
+
+        Returns:
+            ParsedPage with the listings, price statistics, total result
+            count and next-page flag
+        """
+        tree = LexborHTMLParser(self._slice_results(html, keep_controls=True))
+        page = ParsedPage(
+            total_results=self._extract_total_results(tree),
+            has_next=self._extract_has_next(tree),
+        )
+        self._extract_listings(tree, page, collect_rows)
+        return page
+
     def parse_listings(self, html: str) -> list[SoldListing]:
         """Parse sold listings from eBay search results HTML.
 
@@ -103,67 +206,121 @@ class EbayParser:
         Returns:
             List of SoldListing objects
         """
-        soup = BeautifulSoup(html, "lxml")
-        listings = []
-        scraped_at = datetime.utcnow()
+        page = ParsedPage()
+        self._extract_listings(LexborHTMLParser(self._slice_results(html)), page)
+        return page.listings
+
+    @staticmethod
+    def _slice_results(html: str, keep_controls: bool = False) -> str:
+        """Cut page chrome away before the HTML reaches the parser.
+
+        By default only the srp-results list is kept, from its opening <ul>
+        up to the pagination controls. With keep_controls the slice also
+        takes in the result-count heading, wherever it sits relative to the
+        list, and runs through the end of the pagination <nav>, so the count
+        and pagination lookups still work. The full HTML is returned when
+        the markers are missing; Lexbor closes any tags left open.
+        """
+        start = html.find('class="srp-results')
+        count = html.find('class="srp-controls__count') if keep_controls else -1
+        if count != -1 and (start == -1 or count < start):
+            start = count
+        if start == -1:
+            return html
+        start = html.rfind("<", 0, start)
+        if start == -1:
+            return html
+
+        pagination = html.find('class="s-pagination', start)
+        if keep_controls:
+            end = html.find("</nav>", pagination) if pagination != -1 else -1
+            if end == -1 or count > end:
+                return html[start:]
+            return html[start:end + len("</nav>")]
+        if pagination != -1:
+            pagination = html.rfind("<", start, pagination)
+        return html[start:pagination] if pagination > start else html[start:]
+
+    def _extract_listings(
+        self,
+        tree: LexborHTMLParser,
+        page: ParsedPage,
+        collect_rows: bool = True,
+    ) -> None:
+        """Extract sold listings and their price statistics into page."""
+        listings = page.listings
+        price_sum = 0.0
+        price_count = 0
+        min_price = None
+        max_price = None
+        scraped_at = datetime.now(timezone.utc)
 
         # eBay uses s-card class for each listing (new 2024+ structure)
-        items = soup.select("li.s-card")
+        items = tree.css(self._CARD_CSS)
 
         for item in items:
             try:
                 listing = self._parse_card_item(item, scraped_at)
-                if listing:
-                    listings.append(listing)
             except Exception:
                 # Skip items that fail to parse
                 continue
+            if not listing:
+                continue
 
-        return listings
+            price = listing.price
+            price_sum += price
+            price_count += 1
+            if min_price is None or price < min_price:
+                min_price = price
+            if max_price is None or price > max_price:
+                max_price = price
+            if collect_rows:
+                listings.append(listing)
+
+        page.price_sum = price_sum
+        page.price_count = price_count
+        page.min_price = min_price
+        page.max_price = max_price
 
     def _parse_card_item(
-        self, item: Tag, scraped_at: datetime
+        self, item: LexborNode, scraped_at: datetime
     ) -> Optional[SoldListing]:
         """Parse a single listing item using the new s-card structure."""
         # Get listing ID from data attribute
-        listing_id = item.get("data-listingid")
+        listing_id = item.attributes.get("data-listingid")
         if not listing_id:
             return None
 
         # Get title
-        title_elem = item.select_one(".s-card__title")
+        title_elem = item.css_first(self._TITLE_CSS)
         if not title_elem:
             return None
 
-        title = self._clean_title(title_elem.get_text(strip=True))
+        title = self._clean_title(title_elem.text(strip=True))
 
         # Skip placeholder items
         if not title or title.lower() == "shop on ebay":
             return None
 
         # Get URL
-        link_elem = item.select_one("a.s-card__link")
-        url = link_elem.get("href", "") if link_elem else ""
+        link_elem = item.css_first(self._LINK_CSS)
+        url = (link_elem.attributes.get("href") or "") if link_elem else ""
         if not url:
             return None
 
-        # Check if this is a sold listing by looking for "Sold" text
-        sold_text = None
-        for elem in item.find_all(string=lambda t: t and "Sold" in str(t)):
-            text = str(elem).strip()
-            if text.startswith("Sold"):
-                sold_text = text
-                break
+        # Check if this is a sold listing via the "Sold <date>" caption
+        sold_elem = item.css_first(self._SOLD_CSS)
+        sold_text = sold_elem.text(strip=True) if sold_elem else ""
 
         # Only include listings that have been sold
-        if not sold_text:
+        if not sold_text.startswith("Sold"):
             return None
 
         sold_date = self._parse_sold_date(sold_text)
 
         # Get price
-        price_elem = item.select_one(".s-card__price")
-        price_text = price_elem.get_text(strip=True) if price_elem else ""
+        price_elem = item.css_first(self._PRICE_CSS)
+        price_text = price_elem.text(strip=True) if price_elem else ""
         price = self._parse_price(price_text)
 
         if price is None:
@@ -172,9 +329,9 @@ class EbayParser:
         # Get shipping from attribute rows
         shipping_price = None
 
-        attr_rows = item.select(".s-card__attribute-row")
+        attr_rows = item.css(self._ATTRIBUTE_ROW_CSS)
         for row in attr_rows:
-            row_text = row.get_text(strip=True)
+            row_text = row.text(strip=True)
 
             # Check for shipping/delivery info
             if "delivery" in row_text.lower() or "shipping" in row_text.lower():
@@ -192,25 +349,31 @@ class EbayParser:
 
     def get_total_results(self, html: str) -> Optional[int]:
         """Extract total number of results from search page."""
-        soup = BeautifulSoup(html, "lxml")
+        return self._extract_total_results(LexborHTMLParser(html))
+
+    def _extract_total_results(self, tree: LexborHTMLParser) -> Optional[int]:
+        """Extract total number of results from a parsed results page."""
         # Look for results count in various possible locations
-        for selector in [".srp-controls__count-heading", ".srp-controls__count", "[class*='result']"]:
-            count_elem = soup.select_one(selector)
+        for selector in self._COUNT_CSS:
+            count_elem = tree.css_first(selector)
             if count_elem:
-                text = count_elem.get_text()
-                match = re.search(r"([\d,]+)\s*(?:results?|items?)", text, re.IGNORECASE)
+                text = count_elem.text()
+                match = _RESULT_COUNT_RE.search(text)
                 if match:
                     return int(match.group(1).replace(",", ""))
         return None
 
     def has_next_page(self, html: str) -> bool:
         """Check if there's a next page of results."""
-        soup = BeautifulSoup(html, "lxml")
+        return self._extract_has_next(LexborHTMLParser(html))
+
+    def _extract_has_next(self, tree: LexborHTMLParser) -> bool:
+        """Check a parsed results page for a next page link."""
         # Check for pagination controls
-        next_btn = soup.select_one("a.pagination__next, a[aria-label*='next'], a[rel='next']")
+        next_btn = tree.css_first(self._NEXT_CSS)
         if next_btn:
-            classes = next_btn.get("class", [])
+            classes = (next_btn.attributes.get("class") or "").split()
             return "disabled" not in classes
         # Also check if there's a page 2 link
-        page_links = soup.select("a.pagination__item")
+        page_links = tree.css(self._PAGE_LINK_CSS)
         return len(page_links) > 1
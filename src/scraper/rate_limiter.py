@@ -1,52 +1,95 @@
 """Rate limiter to respect eBay's rate limits and avoid getting blocked."""
 
 import asyncio
+import random
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass, field
+from typing import Optional
 
 
 @dataclass
 class RateLimiter:
-    """Token bucket rate limiter for controlling request frequency."""
+    """Sliding-window rate limiter for controlling request frequency.
+
+    Allows at most burst_size requests in any window of
+    burst_size / requests_per_second seconds, so the long-run rate is
+    requests_per_second with bursts of up to burst_size.
+    """
 
     requests_per_second: float = 1.0
     burst_size: int = 5
-    _tokens: float = field(init=False)
-    _last_refill: float = field(init=False)
-    _lock: asyncio.Lock = field(init=False, default_factory=asyncio.Lock)
+    jitter_frac: float = 0.1  # Stretch each wait by up to this fraction
+    _window_ns: int = field(init=False)
+    _requests: deque[int] = field(init=False, default_factory=deque)  # monotonic_ns
+    _cond: Optional[asyncio.Condition] = field(init=False, default=None)
+    _cond_loop: Optional[asyncio.AbstractEventLoop] = field(init=False, default=None)
+    _sync_cond: threading.Condition = field(init=False, default_factory=threading.Condition)
 
     def __post_init__(self):
-        self._tokens = float(self.burst_size)
-        self._last_refill = time.monotonic()
-
-    def _refill(self) -> None:
-        """Refill tokens based on elapsed time."""
-        now = time.monotonic()
-        elapsed = now - self._last_refill
-        self._tokens = min(
-            self.burst_size,
-            self._tokens + elapsed * self.requests_per_second
-        )
-        self._last_refill = now
+        # Integer nanoseconds keep window arithmetic exact over long runs
+        self._window_ns = round(self.burst_size * 1_000_000_000 / self.requests_per_second)
+
+    def _evict(self, now: Optional[int] = None) -> None:
+        """Drop request timestamps that have left the window."""
+        if now is None:
+            now = time.monotonic_ns()
+        cutoff = now - self._window_ns
+        requests = self._requests
+        while requests and requests[0] <= cutoff:
+            requests.popleft()
+
+    def _wait_time(self, now: int) -> float:
+        """Time until the oldest request leaves the window, plus jitter.
+
+        Jitter only ever lengthens the wait, so the window's rate guarantee
+        holds while waiters stop waking on the exact same boundary.
+        """
+        wait_ns = max(self._requests[0] + self._window_ns - now, 0)
+        return wait_ns / 1_000_000_000 * random.uniform(1.0, 1.0 + self.jitter_frac)
+
+    def _get_cond(self) -> asyncio.Condition:
+        """Get the async condition, recreating it for a new event loop.
+
+        asyncio primitives bind to the first loop that waits on them, and
+        each asyncio.run() call starts a fresh loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._cond_loop is not loop:
+            self._cond = asyncio.Condition()
+            self._cond_loop = loop
+        return self._cond
 
     async def acquire(self) -> None:
-        """Wait until a token is available, then consume it."""
-        async with self._lock:
+        """Wait until the window has room, then record a request."""
+        cond = self._get_cond()
+        async with cond:
             while True:
-                self._refill()
-                if self._tokens >= 1.0:
-                    self._tokens -= 1.0
-                    return
-                # Calculate wait time for next token
-                wait_time = (1.0 - self._tokens) / self.requests_per_second
-                await asyncio.sleep(wait_time)
+                now = time.monotonic_ns()
+                self._evict(now)
+                if len(self._requests) < self.burst_size:
+                    break
+                # Calculate wait time until a slot frees up
+                wait_time = self._wait_time(now)
+                try:
+                    # Releases the lock while waiting; woken early by notify()
+                    await asyncio.wait_for(cond.wait(), timeout=wait_time)
+                except TimeoutError:
+                    pass
+            self._requests.append(now)
+            # Hand any remaining slot to the next waiter
+            cond.notify()
 
     def acquire_sync(self) -> None:
         """Synchronous version of acquire for non-async contexts."""
-        while True:
-            self._refill()
-            if self._tokens >= 1.0:
-                self._tokens -= 1.0
-                return
-            wait_time = (1.0 - self._tokens) / self.requests_per_second
-            time.sleep(wait_time)
+        with self._sync_cond:
+            while True:
+                now = time.monotonic_ns()
+                self._evict(now)
+                if len(self._requests) < self.burst_size:
+                    break
+                wait_time = self._wait_time(now)
+                self._sync_cond.wait(timeout=wait_time)
+            self._requests.append(now)
+            self._sync_cond.notify()
@@ -1,12 +1,17 @@
 """Main scraper logic for eBay sold listings."""
 
-import json
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+import orjson
+
+from ..utils.aio import run_sync
+from .dedup import BloomFilter
 from .ebay_client import EbayClient, ChallengePageError
 from .parser import EbayParser, SoldListing
 
@@ -17,8 +22,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_SAFE_QUERY_TRANS = str.maketrans(" ", "_")
+
 
-@dataclass
+@dataclass(slots=True)
 class ScrapeResult:
     """Result of a scraping operation."""
 
@@ -28,16 +35,25 @@ class ScrapeResult:
     listings: list[SoldListing]
     scraped_at: datetime
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
+    def _header_dict(self) -> dict:
+        """Scrape metadata, without the listings."""
         return {
             "query": self.query,
             "total_listings": self.total_listings,
             "pages_scraped": self.pages_scraped,
-            "scraped_at": self.scraped_at.isoformat(),
-            "listings": [listing.to_dict() for listing in self.listings],
+            "scraped_at": self.scraped_at,
         }
 
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization with orjson.
+
+        scraped_at values stay datetime objects, so the dict is only
+        serializable with orjson, not the json module.
+        """
+        result = self._header_dict()
+        result["listings"] = [listing.to_dict() for listing in self.listings]
+        return result
+
 
 class SoldListingsScraper:
     """Scraper for eBay sold listings."""
@@ -46,90 +62,209 @@ class SoldListingsScraper:
         self,
         requests_per_minute: float = 4.0,  # Conservative: ~15 seconds between requests
         max_retries: int = 5,
+        dedup_state_path: Optional[Path] = None,
     ):
         """Initialize the scraper.
 
+        Listing IDs are deduplicated across every scrape made with this
+        scraper. With dedup_state_path set, the seen IDs are also loaded
+        from that file and saved back on close(), so listings kept by an
+        earlier run are skipped.
+
         Args:
             requests_per_minute: Rate limit (default ~15s between requests)
             max_retries: Maximum retry attempts per page
+            dedup_state_path: Optional file persisting seen listing IDs
+                (e.g. data/.bloom_state)
         """
         self.client = EbayClient(
             requests_per_minute=requests_per_minute,
             max_retries=max_retries,
         )
         self.parser = EbayParser()
+        # Pages are parsed here so the event loop keeps driving page fetches
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prepared_dirs: set[Path] = set()
+        self._save_seen_ids = True  # Cleared if a page's listings were lost
+        self._dedup_state_path = Path(dedup_state_path) if dedup_state_path else None
+        if self._dedup_state_path and self._dedup_state_path.exists():
+            self._seen_ids = BloomFilter.load(self._dedup_state_path)
+            logger.info(
+                "Loaded %d seen listing IDs from %s",
+                len(self._seen_ids), self._dedup_state_path,
+            )
+        else:
+            self._seen_ids = BloomFilter(capacity=100_000, error_rate=0.001)
 
     def scrape(
         self,
         query: str,
         max_pages: int = 10,
         max_listings: Optional[int] = None,
+        stream_path: Optional[Path] = None,
     ) -> ScrapeResult:
         """Scrape sold listings for a given query.
 
+        Synchronous wrapper around scrape_async; also safe to call from code
+        that is already running an event loop.
+
         Args:
             query: Search query (e.g., "one piece tcg OP01")
             max_pages: Maximum number of pages to scrape
             max_listings: Maximum number of listings to collect (optional)
+            stream_path: Optional JSONL file that each page's new listings
+                are appended to as soon as they are scraped. Listings are
+                then not kept in memory, and the result has none. The file is
+                opened before any page is fetched.
 
         Returns:
             ScrapeResult containing all scraped listings
         """
-        scraped_at = datetime.utcnow()
-        all_listings: list[SoldListing] = []
-        pages_scraped = 0
-        seen_ids: set[str] = set()
-
-        logger.info(f"Starting scrape for query: {query}")
-
-        for page in range(1, max_pages + 1):
-            logger.info(f"Scraping page {page}...")
-
-            try:
-                html = self.client.fetch_sold_listings(query, page=page)
-                listings = self.parser.parse_listings(html)
-
-                # Deduplicate listings
-                new_listings = []
-                for listing in listings:
-                    if listing.listing_id not in seen_ids:
-                        seen_ids.add(listing.listing_id)
-                        new_listings.append(listing)
-
-                all_listings.extend(new_listings)
-                pages_scraped += 1
-
-                logger.info(
-                    f"Page {page}: Found {len(new_listings)} new listings "
-                    f"(total: {len(all_listings)})"
-                )
+        return run_sync(
+            self.scrape_async(
+                query,
+                max_pages=max_pages,
+                max_listings=max_listings,
+                stream_path=stream_path,
+            )
+        )
 
-                # Check if we've hit the max listings limit
-                if max_listings and len(all_listings) >= max_listings:
-                    all_listings = all_listings[:max_listings]
-                    logger.info(f"Reached max listings limit: {max_listings}")
-                    break
+    async def scrape_async(
+        self,
+        query: str,
+        max_pages: int = 10,
+        max_listings: Optional[int] = None,
+        stream_path: Optional[Path] = None,
+    ) -> ScrapeResult:
+        """Async version of scrape, overlapping fetching with processing.
 
-                # Check if there are more pages
-                if not self.parser.has_next_page(html):
-                    logger.info("No more pages available")
+        Pages are fetched one at a time, in order. Once a page is known to
+        be followed by another one that is still wanted, the next fetch
+        starts while the current page is written out, so no page past the
+        last one or past max_listings is requested. Parsing runs in a
+        worker thread, off the event loop.
+        """
+        scraped_at = datetime.now(timezone.utc)
+        all_listings: list[SoldListing] = []
+        total_listings = 0
+        pages_scraped = 0
+        seen_ids = self._seen_ids
+
+        stream = None
+        if stream_path is not None:
+            stream_path = Path(stream_path)
+            self._prepare_dir(stream_path.parent)
+            # Opened up front, so an unusable path fails before any page is
+            # fetched or any listing is marked as seen
+            stream = open(stream_path, "ab")
+
+        logger.info("Starting scrape for query: %s", query)
+
+        loop = asyncio.get_running_loop()
+        prefetch: Optional[asyncio.Task] = None
+        try:
+            for page in range(1, max_pages + 1):
+                logger.info("Scraping page %d...", page)
+
+                try:
+                    if prefetch is not None:
+                        fetch, prefetch = prefetch, None
+                        html = await fetch
+                    else:
+                        html = await self.client.fetch_sold_listings_async(query, page=page)
+                    # One parse gives both the listings and the next-page flag
+                    parsed = await loop.run_in_executor(
+                        self._executor, self.parser.parse, html
+                    )
+
+                    # Deduplicate in one pass: add() reports whether an ID is
+                    # new, which also drops repeats within the page (the first
+                    # listing wins). The listing cap counts only new listings.
+                    remaining = max_listings - total_listings if max_listings else None
+                    new_listings = []
+                    for listing in parsed.listings:
+                        if remaining is not None and len(new_listings) >= remaining:
+                            break
+                        if seen_ids.add(listing.listing_id):
+                            new_listings.append(listing)
+
+                    limit_reached = (
+                        bool(max_listings)
+                        and total_listings + len(new_listings) >= max_listings
+                    )
+                    if parsed.has_next and not limit_reached and page < max_pages:
+                        # Fetch the next page while this one is written out
+                        prefetch = asyncio.create_task(
+                            self.client.fetch_sold_listings_async(query, page=page + 1)
+                        )
+
+                    if stream is not None:
+                        # Persist this page now so a later failure keeps it
+                        try:
+                            stream.write(b"".join(
+                                orjson.dumps(
+                                    listing.to_dict(), option=orjson.OPT_APPEND_NEWLINE
+                                )
+                                for listing in new_listings
+                            ))
+                            stream.flush()
+                        except OSError as e:
+                            # These IDs are already marked as seen. Stop, and
+                            # don't persist the seen IDs, so the next run picks
+                            # the listings up again rather than losing them
+                            logger.error(
+                                "Could not write page %d to %s: %s", page, stream_path, e
+                            )
+                            self._save_seen_ids = False
+                            break
+                    else:
+                        all_listings.extend(new_listings)
+
+                    total_listings += len(new_listings)
+                    pages_scraped += 1
+
+                    logger.info(
+                        "Page %d: Found %d new listings (total: %d)",
+                        page, len(new_listings), total_listings,
+                    )
+
+                    # Check if we've hit the max listings limit
+                    if limit_reached:
+                        logger.info("Reached max listings limit: %d", max_listings)
+                        break
+
+                    # Check if there are more pages
+                    if not parsed.has_next:
+                        logger.info("No more pages available")
+                        break
+
+                except ChallengePageError as e:
+                    logger.warning("Challenge page on page %d, stopping to avoid detection", page)
                     break
-
-            except ChallengePageError as e:
-                logger.warning(f"Challenge page on page {page}, stopping to avoid detection")
-                break
-            except Exception as e:
-                logger.error(f"Error scraping page {page}: {e}")
-                # Continue to next page instead of breaking immediately
-                continue
+                except Exception as e:
+                    logger.error("Error scraping page %d: %s", page, e)
+                    # Continue to next page instead of breaking immediately
+                    continue
+        finally:
+            if prefetch is not None:
+                prefetch.cancel()
+                await asyncio.gather(prefetch, return_exceptions=True)
+            await self.client.aclose()
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    # Pages are flushed as they are written, so only a page
+                    # whose write already failed (and was reported) is left
+                    pass
 
         logger.info(
-            f"Scrape complete: {len(all_listings)} listings from {pages_scraped} pages"
+            "Scrape complete: %d listings from %d pages", total_listings, pages_scraped
         )
 
         return ScrapeResult(
             query=query,
-            total_listings=len(all_listings),
+            total_listings=total_listings,
             pages_scraped=pages_scraped,
             listings=all_listings,
             scraped_at=scraped_at,
@@ -154,6 +289,12 @@ class SoldListingsScraper:
         query = f"one piece tcg {set_code}"
         return self.scrape(query, max_pages=max_pages, max_listings=max_listings)
 
+    def _prepare_dir(self, directory: Path) -> None:
+        """Create an output directory, once per scraper."""
+        if directory not in self._prepared_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._prepared_dirs.add(directory)
+
     def save_to_json(
         self,
         result: ScrapeResult,
@@ -171,29 +312,54 @@ class SoldListingsScraper:
             Path to the saved file
         """
         output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        self._prepare_dir(output_dir)
 
         if filename is None:
             timestamp = result.scraped_at.strftime("%Y%m%d_%H%M%S")
-            safe_query = result.query.replace(" ", "_").lower()
+            safe_query = result.query.translate(_SAFE_QUERY_TRANS).lower()
             filename = f"sold_listings_{safe_query}_{timestamp}.json"
 
         output_path = output_dir / filename
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
-
-        logger.info(f"Saved results to: {output_path}")
+        with open(output_path, "wb") as f:
+            # Stream one listing at a time rather than building the whole
+            # dict first; the layout matches json.dump(..., indent=2)
+            header = orjson.dumps(result._header_dict(), option=orjson.OPT_INDENT_2)
+            f.write(header[:-2])  # Reopen the object: drop the closing "\n}"
+            f.write(b',\n  "listings": [')
+            for i, listing in enumerate(result.listings):
+                f.write(b",\n    " if i else b"\n    ")
+                body = orjson.dumps(listing.to_dict(), option=orjson.OPT_INDENT_2)
+                f.write(body.replace(b"\n", b"\n    "))
+            f.write(b"\n  ]\n}" if result.listings else b"]\n}")
+
+        logger.info("Saved results to: %s", output_path)
         return output_path
 
-    def close(self) -> None:
-        """Close the scraper and release resources."""
+    def close(self, save_dedup_state: bool = True) -> None:
+        """Close the scraper and release resources.
+
+        Args:
+            save_dedup_state: Write the seen listing IDs to dedup_state_path,
+                if set. Pass False when the scraped listings were not saved,
+                so a later run does not skip them.
+        """
         self.client.close()
+        self._executor.shutdown()
+        if save_dedup_state and self._dedup_state_path:
+            if self._save_seen_ids:
+                self._seen_ids.save(self._dedup_state_path)
+            else:
+                logger.warning(
+                    "Not saving seen listing IDs to %s: some listings were not stored",
+                    self._dedup_state_path,
+                )
 
     def __enter__(self) -> "SoldListingsScraper":
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        self.close()
+        # Only persist seen IDs when the block (e.g. saving output) succeeded
+        self.close(save_dedup_state=exc_type is None)
 
 
 def main():
@@ -232,13 +398,19 @@ def main():
         default="data/raw",
         help="Output directory for JSON files (default: data/raw)"
     )
+    parser.add_argument(
+        "--dedup-state",
+        type=str,
+        default=None,
+        help="File persisting seen listing IDs across runs (e.g. data/.bloom_state)"
+    )
 
     args = parser.parse_args()
 
     if not args.query and not args.set_code:
         parser.error("Either --query or --set is required")
 
-    with SoldListingsScraper() as scraper:
+    with SoldListingsScraper(dedup_state_path=args.dedup_state) as scraper:
         if args.set_code:
             result = scraper.scrape_set(
                 args.set_code,
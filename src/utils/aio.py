@@ -0,0 +1,24 @@
+"""Helpers for calling async code from synchronous callers."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion and return its result.
+
+    Uses asyncio.run() when no event loop is running. Inside a running
+    loop (a notebook, an async web handler) asyncio.run() raises, so the
+    coroutine gets its own loop on a worker thread instead, and the caller
+    blocks until it finishes.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
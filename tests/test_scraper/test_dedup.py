@@ -0,0 +1,70 @@
+"""Tests for the listing ID Bloom filter."""
+
+import pytest
+
+from src.scraper.dedup import BloomFilter
+
+
+def test_added_keys_are_found():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    keys = [f"listing-{i}" for i in range(1_000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert len(bloom) == 1_000
+
+
+def test_add_reports_whether_key_was_new():
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+
+    assert bloom.add("123") is True
+    assert bloom.add("123") is False
+    assert len(bloom) == 1
+
+
+def test_grows_past_capacity_with_bounded_error_rate():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    keys = [f"listing-{i}" for i in range(10_000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_save_load_round_trip(tmp_path):
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    keys = [f"listing-{i}" for i in range(250)]  # spans several slices
+    for key in keys:
+        bloom.add(key)
+    path = tmp_path / "state" / ".bloom_state"
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+
+    assert all(key in loaded for key in keys)
+    assert len(loaded) == len(bloom)
+    assert (loaded.capacity, loaded.error_rate) == (100, 0.01)
+    loaded.add("new")
+    assert "new" in loaded
+
+
+def test_load_rejects_truncated_file(tmp_path):
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    bloom.add("123")
+    path = tmp_path / ".bloom_state"
+    bloom.save(path)
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(ValueError, match="Truncated"):
+        BloomFilter.load(path)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / ".bloom_state"
+    path.write_bytes(b"not a bloom filter state file")
+
+    with pytest.raises(ValueError, match="Not a Bloom filter"):
+        BloomFilter.load(path)
@@ -0,0 +1,133 @@
+"""Tests for the sold listings scrape loop, with eBay fetches stubbed out."""
+
+import orjson
+import pytest
+
+from src.scraper.ebay_client import ChallengePageError
+from src.scraper.sold_listings import SoldListingsScraper
+
+
+def _card(listing_id: str, title: str) -> str:
+    return (
+        f'<li class="s-card" data-listingid="{listing_id}">'
+        '<div class="s-card__caption"><span>Sold  Jan 7, 2026</span></div>'
+        f'<a class="s-card__link" href="https://www.ebay.com/itm/{listing_id}">'
+        f'<div class="s-card__title">{title}</div></a>'
+        '<div class="s-card__attribute-row"><span class="s-card__price">$15.00</span></div>'
+        "</li>"
+    )
+
+
+def _page(cards: list[tuple[str, str]], has_next: bool) -> str:
+    next_class = "pagination__next" if has_next else "pagination__next disabled"
+    return (
+        "<html><body>"
+        '<div class="srp-controls__count-heading"><span>100 results</span></div>'
+        '<ul class="srp-results">'
+        + "".join(_card(listing_id, title) for listing_id, title in cards)
+        + "</ul>"
+        f'<div class="s-pagination"><nav class="pagination">'
+        f'<a class="{next_class}" href="?_pgn=2">Next</a></nav></div>'
+        "</body></html>"
+    )
+
+
+@pytest.fixture
+def scraper():
+    scraper = SoldListingsScraper()
+    yield scraper
+    scraper.close()
+
+
+def _stub_pages(scraper: SoldListingsScraper, pages: dict) -> list[int]:
+    """Serve pages from a dict (HTML or an exception); returns requested pages."""
+    requested = []
+
+    async def fetch_sold_listings_async(query, page=1, items_per_page=120):
+        requested.append(page)
+        result = pages[page]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    scraper.client.fetch_sold_listings_async = fetch_sold_listings_async
+    return requested
+
+
+def test_dedup_within_and_across_pages_keeps_first(scraper):
+    _stub_pages(scraper, {
+        1: _page([("1", "first"), ("2", "two"), ("1", "repeat")], has_next=True),
+        2: _page([("2", "two again"), ("3", "three")], has_next=False),
+    })
+
+    result = scraper.scrape("q", max_pages=5)
+
+    assert [listing.listing_id for listing in result.listings] == ["1", "2", "3"]
+    assert result.listings[0].title == "first"
+    assert result.total_listings == 3
+    assert result.pages_scraped == 2
+
+
+def test_max_listings_counts_only_new_listings(scraper):
+    for listing_id in "abcde":
+        scraper._seen_ids.add(listing_id)
+    _stub_pages(scraper, {
+        1: _page([(listing_id, listing_id) for listing_id in "abcdefghij"], has_next=False),
+    })
+
+    result = scraper.scrape("q", max_pages=1, max_listings=5)
+
+    assert [listing.listing_id for listing in result.listings] == list("fghij")
+
+
+def test_no_fetch_past_last_page(scraper):
+    requested = _stub_pages(scraper, {
+        1: _page([("1", "one")], has_next=True),
+        2: _page([("2", "two")], has_next=False),
+    })
+
+    scraper.scrape("q", max_pages=10)
+
+    assert requested == [1, 2]
+
+
+def test_no_fetch_past_max_listings(scraper):
+    requested = _stub_pages(scraper, {
+        1: _page([("1", "one"), ("2", "two"), ("3", "three")], has_next=True),
+    })
+
+    result = scraper.scrape("q", max_pages=10, max_listings=3)
+
+    assert requested == [1]
+    assert result.total_listings == 3
+
+
+def test_stops_on_challenge_page(scraper):
+    requested = _stub_pages(scraper, {
+        1: _page([("1", "one")], has_next=True),
+        2: ChallengePageError("challenge"),
+        3: _page([("3", "three")], has_next=False),
+    })
+
+    result = scraper.scrape("q", max_pages=3)
+
+    assert requested == [1, 2]
+    assert [listing.listing_id for listing in result.listings] == ["1"]
+    assert result.pages_scraped == 1
+
+
+def test_stream_path_writes_jsonl(scraper, tmp_path):
+    _stub_pages(scraper, {
+        1: _page([("1", "one"), ("2", "two")], has_next=True),
+        2: _page([("3", "three")], has_next=False),
+    })
+    stream_path = tmp_path / "out" / "listings.jsonl"
+
+    result = scraper.scrape("q", max_pages=5, stream_path=stream_path)
+
+    rows = [orjson.loads(line) for line in stream_path.read_bytes().splitlines()]
+    assert [row["listing_id"] for row in rows] == ["1", "2", "3"]
+    assert rows[0]["title"] == "one"
+    assert rows[0]["price"] == 15.0
+    assert result.listings == []
+    assert result.total_listings == 3